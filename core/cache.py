@@ -1,18 +1,45 @@
+import sys
 import time
-from functools import lru_cache
+import threading
+from cachetools import TTLCache
 
-@lru_cache(maxsize=2048)
-def memo(key: str, value: str):
-    # 占位：用于 requests 级缓存可替换为 requests-cache
-    return value
+# 进程级 HTTP 响应缓存（按字节计的上限 + 6 小时过期），Streamlit 重跑之间共享；
+# 只有成功的页面才会写入（_fetch 已过滤机器人验证页）。
+# 值是整页解码后的 HTML（1–2 MB，非 Latin-1 字符的 str 更大），所以按 sys.getsizeof
+# 的实际内存计数，而不是按条目数
+HTTP_CACHE_TTL = 6 * 3600
+HTTP_CACHE_BYTES = 256 * 1024 * 1024
+_HTTP_CACHE = TTLCache(maxsize=HTTP_CACHE_BYTES, ttl=HTTP_CACHE_TTL, getsizeof=sys.getsizeof)
+_HTTP_LOCK = threading.Lock()
+
+def cached_fetch(key, loader):
+    """按 key 取缓存，未命中时调用 loader() 并写入；loader 返回 None（失败）时不缓存。"""
+    with _HTTP_LOCK:
+        # TTLCache 只在写入时清理过期项；读路径上也清一次，过期页面不继续占用字节预算
+        _HTTP_CACHE.expire()
+        v = _HTTP_CACHE.get(key)
+    if v is None:
+        v = loader()
+        # 单个值超过整个预算时不缓存（TTLCache 会直接抛 ValueError）
+        if v is not None and sys.getsizeof(v) <= HTTP_CACHE_BYTES:
+            with _HTTP_LOCK:
+                _HTTP_CACHE[key] = v
+    return v
 
 class SimpleRateLimiter:
-    def __init__(self, qps: float = 2.0):
+    """基于 time.monotonic() 截止时间的限速器，线程安全。
+
+    burst：开始限速前允许连续放行的调用次数。
+    """
+    def __init__(self, qps: float = 2.0, burst: int = 1):
         self.gap = 1.0 / qps
-        self.last = 0.0
+        self.burst = max(1, int(burst))
+        self.last = time.monotonic() - self.gap * self.burst
+        self._lock = threading.Lock()
     def wait(self):
-        now = time.time()
-        delta = now - self.last
-        if delta < self.gap:
-            time.sleep(self.gap - delta)
-        self.last = time.time()
+        with self._lock:
+            wait = self.last + self.gap - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            # 截止时间前进一个间隔，但空闲时最多只攒下 burst 个名额
+            self.last = max(self.last + self.gap, time.monotonic() - self.gap * (self.burst - 1))
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import functools
+import os
 import yaml
 from pydantic import BaseModel
 import streamlit as st
@@ -60,23 +62,23 @@ class Cfg(BaseModel):
 # ---------------------------
 # Secrets helper
 # ---------------------------
+@functools.lru_cache(maxsize=1)
 def _read_secrets_key() -> str | None:
-    # Support both KEEPA_API_KEY and [keepa].api_key
-    api = None
+    # Support both KEEPA_API_KEY and [keepa].api_key; looked up once per process
+    # (call _read_secrets_key.cache_clear() to pick up a rotated key)
     try:
-        if "KEEPA_API_KEY" in st.secrets:
-            api = st.secrets.get("KEEPA_API_KEY")
-        elif "keepa" in st.secrets and "api_key" in st.secrets["keepa"]:
-            api = st.secrets["keepa"]["api_key"]
+        return st.secrets.get("KEEPA_API_KEY") or st.secrets.get("keepa", {}).get("api_key")
     except Exception:
         # st.secrets may not exist in local plain runs; ignore
-        api = None
-    return api
+        return None
 
 # ---------------------------
 # Loader
 # ---------------------------
-def load_config(path: str) -> Cfg:
+@st.cache_resource(show_spinner=False)
+def _load_config_cached(path: str, mtime: float) -> Cfg:
+    # mtime is part of the cache key only: editing config.yaml invalidates the entry;
+    # a rotated Keepa key needs _read_secrets_key.cache_clear() plus a config touch or .clear()
     # read yaml
     with open(path, "r", encoding="utf-8") as f:
         raw = yaml.safe_load(f) or {}
@@ -85,19 +87,9 @@ def load_config(path: str) -> Cfg:
     raw.setdefault("keepa", {})
     raw["keepa"]["api_key"] = _read_secrets_key()
 
-    # ensure keyword_mining exists with safe defaults
-    km = raw.setdefault("keyword_mining", {})
-    km.setdefault("min_df", 2)
-    km.setdefault("max_top", 200)
-    km.setdefault("ngram_range", [1, 3])
-    km.setdefault("stopwords", [])
-    km.setdefault("suggest_probe", False)
-    km.setdefault("weight", {
-        "title": 1.0,
-        "bullets": 0.7,
-        "aplus": 0.4,
-        "brand_bonus": 0.0,
-    })
-    km.setdefault("bsr_correlation_window", 5)
+    # keyword_mining defaults live on KeywordMiningCfg; validate the tree in one pass
+    return Cfg.model_validate(raw)
 
-    return Cfg(**raw)
+def load_config(path: str) -> Cfg:
+    # parsed once per (path, mtime) and shared across Streamlit reruns
+    return _load_config_cached(path, os.path.getmtime(path))
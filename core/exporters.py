@@ -1,19 +1,70 @@
 import io, zipfile
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
+import xlsxwriter
+
+# same header style as pandas to_excel: bold, thin border, centred
+HEADER_FMT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+def _new_workbook(bio: io.BytesIO) -> xlsxwriter.Workbook:
+    return xlsxwriter.Workbook(bio, {
+        "constant_memory": True,
+        "strings_to_urls": False,
+        "default_date_format": "yyyy-mm-dd hh:mm:ss",
+    })
+
+def _cell(v):
+    # NaN/NA/NaT -> None so xlsxwriter leaves the cell blank (same as to_excel)
+    if v is None or v is pd.NA or v is pd.NaT or v != v:
+        return None
+    # numpy scalars (np.bool_ from nullable boolean columns) -> python, else bools land as 0/1
+    return v.item() if isinstance(v, np.generic) else v
+
+def _write_sheet(wb: xlsxwriter.Workbook, df: pd.DataFrame, sheet_name: str, header_fmt) -> None:
+    # constant_memory flushes each row once written (O(1) memory in row count),
+    # so cells must go out strictly row by row: header first, then itertuples
+    ws = wb.add_worksheet(sheet_name[:31])
+    ws.write_row(0, 0, [str(c) for c in df.columns], header_fmt)
+    for r, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        ws.write_row(r, 0, [_cell(v) for v in row])
+
+def _xlsx_bytes(df: pd.DataFrame, sheet_name: str) -> bytes:
+    bio = io.BytesIO()
+    wb = _new_workbook(bio)
+    _write_sheet(wb, df, sheet_name, wb.add_format(HEADER_FMT))
+    wb.close()
+    return bio.getvalue()
+
+def to_single_xlsx_bytes(dfs: dict[str, pd.DataFrame]) -> bytes:
+    """One workbook with one sheet per table (shared styles / string table)."""
+    bio = io.BytesIO()
+    wb = _new_workbook(bio)
+    header_fmt = wb.add_format(HEADER_FMT)
+    for name, df in dfs.items():
+        _write_sheet(wb, df, name, header_fmt)
+    wb.close()
+    return bio.getvalue()
 
 def to_excel_zip(dfs: dict[str, pd.DataFrame]) -> io.BytesIO:
+    # one <name>.xlsx per table, for uploads that need separate files
     buf = io.BytesIO()
+    names = list(dfs)
+    # render sheets concurrently; ZipFile is not thread-safe, so append on this thread
+    with ThreadPoolExecutor(max_workers=max(1, min(8, len(names)))) as ex:
+        blobs = list(ex.map(lambda n: _xlsx_bytes(dfs[n], n), names))
     with zipfile.ZipFile(buf, mode="w", compression=zipfile.ZIP_DEFLATED) as zf:
-        for name, df in dfs.items():
-            bio = io.BytesIO()
-            with pd.ExcelWriter(bio, engine="openpyxl") as xw:
-                df.to_excel(xw, index=False, sheet_name=name[:31])
-            zf.writestr(f"{name}.xlsx", bio.getvalue())
+        for name, blob in zip(names, blobs):
+            zf.writestr(f"{name}.xlsx", blob)
     buf.seek(0)
     return buf
 
 def to_csv_bytes(df: pd.DataFrame) -> bytes:
+    # pandas writer on purpose: pyarrow.csv quotes every string field (header included),
+    # writes bools as true/false, integral floats as "3" / "1.23e+11" and long datetimes,
+    # so its downloads would not match what users already import
     return df.to_csv(index=False).encode("utf-8")
+
 def to_csv_bytes_many(named_dfs: dict[str, pd.DataFrame]) -> io.BytesIO:
     buf = io.BytesIO()
     import zipfile
@@ -21,6 +72,6 @@ def to_csv_bytes_many(named_dfs: dict[str, pd.DataFrame]) -> io.BytesIO:
         for fname, df in named_dfs.items():
             if not fname.endswith(".csv"):
                 fname = fname + ".csv"
-            zf.writestr(fname, df.to_csv(index=False).encode("utf-8"))
+            zf.writestr(fname, to_csv_bytes(df))
     buf.seek(0)
     return buf
@@ -4,34 +4,66 @@ import streamlit as st
 from core.config import load_config
 from ppc.loader import load_search_terms
 from services.ppc_rules import make_recommendations
-from core.exporters import to_excel_zip
+from core.exporters import to_excel_zip, to_single_xlsx_bytes
 
 st.set_page_config(page_title="PPC Optimizer", page_icon="📈", layout="wide")
 st.title("📈 PPC Optimizer")
 
 cfg = load_config("config.yaml")
 
-uploaded = st.file_uploader("上传 Amazon Search Term Report（CSV/XLSX）", type=["csv","xlsx"])
+# 页面缓存上限：共享服务器上每份上传报表（原始字节 + 解析后的 DataFrame）都会常驻内存，
+# 只保留最近几份并按时间过期
+PAGE_CACHE_MAX = 8
+PAGE_CACHE_TTL = 3600
+
+@st.cache_data(show_spinner=False, max_entries=PAGE_CACHE_MAX, ttl=PAGE_CACHE_TTL)
+def _parse(data: bytes, name: str) -> pd.DataFrame:
+    # 以文件字节为缓存键：上传后其他控件触发的重跑不再重复解析
+    return load_search_terms(data, name)
+
+@st.cache_data(show_spinner=False, max_entries=PAGE_CACHE_MAX, ttl=PAGE_CACHE_TTL)
+def _recs(df: pd.DataFrame, cfg_key: str, _cfg) -> dict[str, pd.DataFrame]:
+    # cfg_key（配置指纹）参与缓存键；_cfg 以下划线开头，Streamlit 不对其做哈希
+    return make_recommendations(df, _cfg)
+
+@st.cache_data(show_spinner=False, max_entries=PAGE_CACHE_MAX, ttl=PAGE_CACHE_TTL)
+def _export(df: pd.DataFrame, cfg_key: str, _cfg, as_zip: bool) -> bytes:
+    # 与 _recs 同键：勾选预览、切换下载格式等重跑直接复用已生成的文件字节
+    recs = _recs(df, cfg_key, _cfg)
+    return to_excel_zip(recs).getvalue() if as_zip else to_single_xlsx_bytes(recs)
+
+uploaded = st.file_uploader("上传 Amazon Search Term Report（CSV/XLSX/XLS）", type=["csv","xlsx","xls"])
 if uploaded:
     with st.spinner("解析报表中..."):
-        df = load_search_terms(uploaded)
+        df = _parse(uploaded.getvalue(), uploaded.name)
     st.success(f"加载完成：{len(df)} 行")
-    st.dataframe(df.head(50), use_container_width=True)
+    # 预览按需渲染：expander 内的代码每次重跑都会执行，只有不勾选时才省掉 Arrow 序列化
+    if st.checkbox("显示原始报表预览（前 50 行）", value=False):
+        st.dataframe(df.head(50), use_container_width=True)
 
+    cfg_key = cfg.model_dump_json()
     with st.spinner("计算建议中..."):
-        recs = make_recommendations(df, cfg)
+        recs = _recs(df, cfg_key, cfg)
     st.subheader("建议摘要")
     for k, v in recs.items():
         st.write(f"**{k}**：{len(v)} 行")
         if len(v):
             st.dataframe(v.head(50), use_container_width=True)
 
-    buf = to_excel_zip(recs)
-    st.download_button(
-        "⬇️ 下载全部建议（Zip 内含多表）",
-        data=buf.getvalue(),
-        file_name="ppc_output.zip",
-        mime="application/zip",
-    )
+    fmt = st.radio("下载格式", ["单个 XLSX（每表一个 sheet）", "ZIP（每表一个 XLSX 文件）"], index=0, horizontal=True)
+    if fmt.startswith("单个"):
+        st.download_button(
+            "⬇️ 下载全部建议（单个 XLSX，多 sheet）",
+            data=_export(df, cfg_key, cfg, False),
+            file_name="ppc_output.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        )
+    else:
+        st.download_button(
+            "⬇️ 下载全部建议（Zip 内含多表）",
+            data=_export(df, cfg_key, cfg, True),
+            file_name="ppc_output.zip",
+            mime="application/zip",
+        )
 else:
     st.info("请先上传报表。")
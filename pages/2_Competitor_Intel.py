@@ -1,3 +1,5 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 import pandas as pd
 import streamlit as st
 from core.config import load_config
@@ -10,24 +12,27 @@ st.set_page_config(page_title="Competitor Intelligence", page_icon="🕵️", la
 st.title("🕵️ Competitor Intelligence")
 
 cfg = load_config("config.yaml")
+
 domain_name = st.selectbox("站点", list(cfg.keepa.domain_map.keys()), index=0)
 asin = st.text_input("输入种子 ASIN（如 B08CH9HFSC）").strip().upper()
 max_n = st.slider("最大抓取数量（最终显示前 N 条按相关性排序）", 20, 300, 120, 10)
 
 if st.button("开始抓取", disabled=not asin):
-    with st.spinner("Keepa 抓取中..."):
+    # Keepa 与 HTML 回退两路互不依赖，并行抓取
+    with st.spinner("Keepa + HTML 抓取相关 ASIN 中..."):
         kc = KeepaClient(cfg.keepa.api_key, cfg.keepa.domain_map, cfg.keepa.timeout, cfg.keepa.retries)
-        related, err = kc.product_related(asin, domain_name, cfg.keepa.history)
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            fk = ex.submit(kc.product_related, asin, domain_name, cfg.keepa.history)
+            fh = ex.submit(search_related_html, asin, domain_name)
+            related, err = fk.result()
+            html_related = fh.result()
     if err:
         st.warning(f"Keepa 提示：{err}")
 
-    # HTML 回退补充
-    with st.spinner("HTML 回退抓取中..."):
-        html_related = search_related_html(asin, domain_name)
-
-    all_asins = sorted(set([x for x in (related or [])] + [y for y in (html_related or [])]))
-    if asin in all_asins:
-        all_asins.remove(asin)
+    # 一次去重并保留来源顺序（Keepa 在前，HTML 补充在后）
+    seen = dict.fromkeys(a.upper() for a in chain(related or [], html_related or []) if a and len(a) == 10)
+    seen.pop(asin, None)
+    all_asins = list(seen)
     st.write(f"合并去重后 ASIN 数：{len(all_asins)}")
 
     with st.spinner("补全商品信息..."):
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import chain
 
 from core.config import load_config
 from core.exporters import to_csv_bytes, to_csv_bytes_many
@@ -37,36 +39,34 @@ run = st.button("Run analysis", disabled=(not seed_asin))
 
 if run:
     # 1) Collect related ASINs via Keepa and/or HTML
-    all_asins = set()
     keepa_err = None
     kc = None  # placeholder for Keepa client
 
     if do_keepa:
-        with st.spinner("Fetching related ASINs via Keepa..."):
-            kc = KeepaClient(
-                cfg.keepa.api_key,
-                cfg.keepa.domain_map,
-                cfg.keepa.timeout,
-                cfg.keepa.retries,
-            )
-            rel, keepa_err = kc.product_related(seed_asin, domain_name, cfg.keepa.history)
-            if rel:
-                all_asins.update(rel)
+        kc = KeepaClient(
+            cfg.keepa.api_key,
+            cfg.keepa.domain_map,
+            cfg.keepa.timeout,
+            cfg.keepa.retries,
+        )
+
+    # The two channels are independent network calls: run them concurrently
+    with st.spinner("Fetching related ASINs (Keepa / HTML fallback)..."):
+        with ThreadPoolExecutor(max_workers=2) as ex:
+            fk = ex.submit(kc.product_related, seed_asin, domain_name, cfg.keepa.history) if do_keepa else None
+            fh = ex.submit(search_related_html, seed_asin, domain_name) if do_html else None
+            rel, keepa_err = fk.result() if fk else ([], None)
+            rel_html = fh.result() if fh else []
     if keepa_err:
         st.warning("Keepa warning: {}".format(keepa_err))
 
-    if do_html:
-        with st.spinner("Fetching related ASINs via HTML fallback..."):
-            rel_html = search_related_html(seed_asin, domain_name)
-            if rel_html:
-                all_asins.update(rel_html)
-
-    # Clean, uppercase and cap
-    all_asins = [
-        a.upper() for a in all_asins
-        if a and isinstance(a, str) and len(a) == 10 and a.upper() != seed_asin
-    ]
-    all_asins = sorted(all_asins)[:max_cluster]
+    # Merge, uppercase, dedupe and cap in one pass; Keepa order first, then HTML additions
+    seen = dict.fromkeys(
+        a.upper() for a in chain(rel or [], rel_html or [])
+        if a and isinstance(a, str) and len(a) == 10
+    )
+    seen.pop(seed_asin, None)
+    all_asins = list(seen)[:max_cluster]
     st.info("Related ASINs after merge and dedupe: {}".format(len(all_asins)))
 
     if not all_asins:
@@ -89,17 +89,20 @@ if run:
     # 4) Keyword mining (n-gram, weighting, de-noise)
     with st.spinner("Mining and scoring keywords..."):
         kw_table, debug_rows = mine_keywords_from_cluster(texts, cfg.keyword_mining)
+    # Slice once and reuse for display, downloads, BSR and ZIP
+    top_limit = getattr(cfg.keyword_mining, "max_top", 200)
+    kw_top = kw_table.head(top_limit)
+    df_debug = pd.DataFrame(debug_rows)
 
     st.subheader("Keyword leaderboard (sorted by score/coverage)")
-    top_limit = getattr(cfg.keyword_mining, "max_top", 200)
     try:
-        st.dataframe(kw_table.head(top_limit), use_container_width=True)
+        st.dataframe(kw_top, use_container_width=True)
     except Exception:
-        st.dataframe(kw_table.head(top_limit))
+        st.dataframe(kw_top)
 
     st.download_button(
         "Download keyword leaderboard (CSV)",
-        to_csv_bytes(kw_table.head(top_limit)),
+        to_csv_bytes(kw_top),
         file_name="{}_keyword_leaderboard.csv".format(seed_asin),
         mime="text/csv",
     )
@@ -109,7 +112,7 @@ if run:
     if window and kc is not None and cfg.keepa.api_key:
         with st.spinner("Computing BSR sync signal (sampling top 50 related ASINs)..."):
             kw_table_bsr = attach_bsr_signal(
-                kw_table.head(top_limit).copy(),
+                kw_top,  # attach_bsr_signal works on its own copy
                 candidate_asins=all_asins[:50],
                 keepa_client=kc,
                 window=window,
@@ -117,13 +120,13 @@ if run:
             )
         st.subheader("Keyword leaderboard with BSR sync signal")
         try:
-            st.dataframe(kw_table_bsr.head(top_limit), use_container_width=True)
+            st.dataframe(kw_table_bsr, use_container_width=True)
         except Exception:
-            st.dataframe(kw_table_bsr.head(top_limit))
+            st.dataframe(kw_table_bsr)
 
         st.download_button(
             "Download (with BSR signal) CSV",
-            to_csv_bytes(kw_table_bsr.head(top_limit)),
+            to_csv_bytes(kw_table_bsr),
             file_name="{}_keyword_leaderboard_bsr.csv".format(seed_asin),
             mime="text/csv",
         )
@@ -134,23 +137,23 @@ if run:
     with st.expander("Debug / traceability (samples)"):
         st.write("Number of text samples used: {}".format(len(debug_rows)))
         if debug_rows:
-            df_dbg = pd.DataFrame(debug_rows).head(200)
+            df_dbg = df_debug.head(200)
             try:
                 st.dataframe(df_dbg, use_container_width=True)
             except Exception:
                 st.dataframe(df_dbg)
 
     # 7) One-click ZIP
-    zip_buf = to_csv_bytes_many(
+    zip_bytes = to_csv_bytes_many(
         {
             "competitor_meta.csv": df_full,
-            "keyword_leaderboard.csv": kw_table.head(top_limit),
-            "debug_samples.csv": pd.DataFrame(debug_rows),
+            "keyword_leaderboard.csv": kw_top,
+            "debug_samples.csv": df_debug,
         }
-    )
+    ).getvalue()
     st.download_button(
         "Download all as ZIP",
-        data=zip_buf.getvalue(),
+        data=zip_bytes,
         file_name="keyword_intel_{}_{}.zip".format(seed_asin, datetime.now().date()),
         mime="application/zip",
     )
@@ -1,48 +1,65 @@
+import io
 import pandas as pd
 
-def load_search_terms(file) -> pd.DataFrame:
-    # 兼容 CSV/XLSX
-    try:
-        df = pd.read_csv(file)
-    except Exception:
-        file.seek(0)
-        df = pd.read_excel(file)
-
-    # 尽量标准化常见字段名（你可根据自己的导出模板补充映射）
-    rename_map = {
-        "Customer Search Term":"keyword",
-        "Search term":"keyword",
-        "Keyword text":"keyword",
-        "Match Type":"match_type",
-        "Match type":"match_type",
-        "Campaign Name":"campaign",
-        "Ad Group Name":"ad_group",
-        "Impressions":"impressions",
-        "Clicks":"clicks",
-        "Orders (Total)":"orders",
-        "7 Day Total Orders (#)":"orders",
-        "Spend":"spend",
-        "7 Day Total Sales ":"sales",
-        "7 Day Total Sales ($)":"sales",
-        "Sales":"sales",
-    }
-    for col in list(rename_map):
-        if col in df.columns:
-            df.rename(columns={col: rename_map[col]}, inplace=True)
-
-    # 缺失列填充
-    for col in ["keyword","match_type","campaign","ad_group","impressions","clicks","orders","spend","sales"]:
-        if col not in df.columns:
-            df[col] = 0 if col in ("impressions","clicks","orders","spend","sales") else ""
-
-    # 类型转换
-    num_cols = ["impressions","clicks","orders","spend","sales"]
-    for c in num_cols:
-        df[c] = pd.to_numeric(df[c], errors="coerce").fillna(0)
-
-    df["keyword"] = df["keyword"].astype(str)
-    df["match_type"] = df["match_type"].astype(str)
-    df["campaign"] = df["campaign"].astype(str)
-    df["ad_group"] = df["ad_group"].astype(str)
+# 尽量标准化常见字段名（你可根据自己的导出模板补充映射）
+RENAME_MAP = {
+    "Customer Search Term":"keyword",
+    "Search term":"keyword",
+    "Keyword text":"keyword",
+    "Match Type":"match_type",
+    "Match type":"match_type",
+    "Campaign Name":"campaign",
+    "Ad Group Name":"ad_group",
+    "Impressions":"impressions",
+    "Clicks":"clicks",
+    "Orders (Total)":"orders",
+    "7 Day Total Orders (#)":"orders",
+    "Spend":"spend",
+    "7 Day Total Sales ":"sales",
+    "7 Day Total Sales ($)":"sales",
+    "Sales":"sales",
+}
+
+NUM_COLS = ["impressions","clicks","orders","spend","sales"]
+STR_COLS = ["keyword","match_type","campaign","ad_group"]
+COUNT_COLS = ["impressions","clicks","orders"]
+CATEGORY_COLS = ["match_type","campaign","ad_group"]
+REQUIRED_COLS = ["keyword","match_type","campaign","ad_group","impressions","clicks","orders","spend","sales"]
+
+def _wanted(col) -> bool:
+    # 只解析映射表里的原始列名和已标准化的列名，其余列（Portfolio/Targeting 等）不读入
+    return col in RENAME_MAP or col in RENAME_MAP.values()
+
+def load_search_terms(data: bytes, name: str) -> pd.DataFrame:
+    # 兼容 CSV/XLSX：按文件后缀分派，解析错误直接抛出而不是被当成 Excel 再试一次
+    if name.lower().endswith((".xlsx", ".xls")):
+        # calamine（Rust）读取器比 openpyxl 快数倍
+        df = pd.read_excel(io.BytesIO(data), engine="calamine", usecols=_wanted)
+    else:
+        # 先只读表头，得到需要的列，再用 pyarrow 引擎只解析这些列
+        header = pd.read_csv(io.BytesIO(data), nrows=0).columns
+        usecols = [c for c in header if _wanted(c)] or None
+        df = pd.read_csv(io.BytesIO(data), engine="pyarrow", usecols=usecols)
+
+    df = df.rename(columns=RENAME_MAP)
+    # 报表里可能同时有两列映射到同一名字（如 Customer Search Term 与 Search term），保留第一列
+    df = df.loc[:, ~df.columns.duplicated()]
+
+    # 缺失列填充（数值列补 0，文本列补 ""）
+    missing = [c for c in REQUIRED_COLS if c not in df.columns]
+    df = df.assign(**{c: "" if c in STR_COLS else 0 for c in missing})
+
+    # 类型转换：整块转换，而不是逐列赋值
+    df[NUM_COLS] = df[NUM_COLS].apply(pd.to_numeric, errors="coerce").fillna(0)
+    df[STR_COLS] = df[STR_COLS].astype("string")
+
+    # 压缩内存：计数列用 uint32（越界/非整数时保持原类型），低基数文本列用 category；
+    # spend/sales 保持 float64，float32 会让 ACoS 在目标值边界处比较结果翻转
+    for c in COUNT_COLS:
+        col = df[c]
+        if len(col) and col.min() >= 0 and col.max() < 2**32 and (col % 1 == 0).all():
+            df[c] = col.astype("uint32")
+    for c in CATEGORY_COLS:
+        df[c] = df[c].astype("category")
 
     return df
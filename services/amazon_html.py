@@ -9,16 +9,22 @@ Notes:
 - Mobile page (/gp/aw/d/<ASIN>) is simpler to parse; desktop (/dp/<ASIN>) is used as fallback.
 - This code is lightweight and best-effort; Amazon may rate limit or show bot checks.
 - For production, consider adding proxy/rotating headers and stricter error handling.
+- Per-ASIN fetches run on a small thread pool (DEFAULT_CONCURRENCY) to overlap latency.
 """
 
 from __future__ import annotations
 import re
-import time
+import atexit
 import random
+import functools
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Optional
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from bs4 import BeautifulSoup
 import pandas as pd
+from core.cache import cached_fetch, SimpleRateLimiter
 
 USER_AGENTS = [
     "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36",
@@ -30,6 +36,7 @@ USER_AGENTS = [
 HEADERS_BASE = {
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "en-GB,en;q=0.9",
+    "Accept-Encoding": "gzip, deflate",
     "Cache-Control": "no-cache",
     "Pragma": "no-cache",
 }
@@ -37,9 +44,51 @@ HEADERS_BASE = {
 DP_URL = "https://{domain}/dp/{asin}?th=1&psc=1"
 MOBILE_URL = "https://{domain}/gp/aw/d/{asin}"
 
-ASIN_RE = re.compile(r"/dp/([A-Z0-9]{10})")
+# ASINs fetched in parallel by enrich_product_info / scrape_listing_text
+DEFAULT_CONCURRENCY = 4
+# keep-alive connections per marketplace; workers are capped to this so none of them
+# has its connection discarded by a full pool and pays a fresh TLS handshake
+POOL_MAXSIZE = 32
+# retries with exponential backoff on connection errors, 429 and 5xx; Retry-After is honoured
+HTTP_RETRY = Retry(
+    total=2, backoff_factor=0.6, status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=("GET",), respect_retry_after_header=True, raise_on_status=False,
+)
+# characters scanned for bot-check markers
+BOT_CHECK_HEAD = 8192
+# global pacing of real page requests across all workers (cache hits are not throttled)
+HTML_QPS = 2.0
+_LIMITER = SimpleRateLimiter(qps=HTML_QPS)
+
+# enrich_product_info output columns and dtypes; brand/category stay object so
+# falsy checks downstream (relevance.brand_flag) keep working on missing values
+ENRICH_DTYPES = {
+    "asin": "string",
+    "title": "string",
+    "price": "float64",
+    "rating": "float64",
+    "reviews": "Int32",
+    "url": "string",
+    "brand": "object",
+    "category": "object",
+}
+
+# related ASINs straight from raw HTML: data-asin="B0..." attributes or /dp/<ASIN> links
+RELATED_RE = re.compile(r"""(?i:data-asin=["']\s*(B0[A-Z0-9]{8})\s*["'])|/dp/([A-Z0-9]{10})""")
 STAR_RE = re.compile(r"([0-9.]+)\s+out of 5")
 INT_RE = re.compile(r"([0-9][0-9,\.]*)")
+PRICE_RE = re.compile(r"([0-9]+(?:\.[0-9]+)?)")
+PRICE_STRIP_TBL = str.maketrans("", "", ",£$€")
+COMMA_STRIP_TBL = str.maketrans("", "", ",")
+UI_SPLIT_RE = re.compile(r"(?<=[.!?])\s+|\s*\|\s*")
+
+# CSS selectors tried in order by the extractors (soupsieve caches the compiled form)
+SEL_APLUS = (
+    "#aplus", "#aplus_feature_div", "#aplus3p_feature_div",
+    "div.aplus", "div.aplus-v2", "div.aplus-module",
+)
+SEL_PRICE = ("#priceblock_ourprice", "#priceblock_dealprice", "span.a-price > span.a-offscreen", "span.a-price-whole")
+SEL_BRAND_ROWS = "#productDetails_techSpec_section_1 tr, #productDetails_detailBullets_sections1 tr"
 
 # ---------------------------
 # A+ UI noise blacklist
@@ -61,42 +110,82 @@ def _strip_ui_lines(txt: str) -> str:
     if not txt:
         return ""
     # split by sentence or pipe and drop UI noise sentences
-    parts = re.split(r"(?<=[.!?])\s+|\s*\|\s*", txt)
+    parts = UI_SPLIT_RE.split(txt)
     clean = [p.strip() for p in parts if p and not APLUIS_RE.search(p)]
     return " | ".join(clean)
 
-def _make_session() -> requests.Session:
+_SESSIONS: List[requests.Session] = []
+
+@functools.lru_cache(maxsize=None)
+def _session_for(domain: str) -> requests.Session:
+    # one pooled session per marketplace for the process lifetime: keep-alive and TLS reuse across calls
     s = requests.Session()
-    s.headers.update(HEADERS_BASE.copy())
+    s.headers.update(HEADERS_BASE)
+    # mount on the scheme, not the marketplace host: amazon.<tld> redirects to www.amazon.<tld>,
+    # which would otherwise fall through to requests' default adapter (no retries, pool of 10).
+    # The session is already per-domain, so nothing else shares this adapter.
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=POOL_MAXSIZE, max_retries=HTTP_RETRY))
+    _SESSIONS.append(s)
     return s
 
-def _get(session: requests.Session, url: str, timeout: int = 20, retries: int = 2, qps: float = 1.2) -> Optional[str]:
-    last_err = None
-    gap = 1.0 / max(qps, 0.1)
-    for i in range(retries + 1):
-        try:
-            headers = {"User-Agent": random.choice(USER_AGENTS)}
-            resp = session.get(url, headers=headers, timeout=timeout)
-            txt = resp.text or ""
-            if resp.status_code == 200 and ("Robot Check" not in txt and "captcha" not in txt.lower()):
-                return txt
-            last_err = f"status {resp.status_code}"
-        except Exception as e:
-            last_err = str(e)
-        time.sleep(gap * (1.0 + 0.5 * i))
+@atexit.register
+def _close_sessions() -> None:
+    for s in _SESSIONS:
+        s.close()
+
+def _get(session: requests.Session, url: str, timeout: int = 20) -> Optional[str]:
+    # idempotent page GETs go through the shared cache; failures (None) are not cached.
+    # Enrich and scrape read the same full dp/mobile bodies, so they share one entry per URL.
+    return cached_fetch(url, lambda: _fetch(session, url, timeout=timeout))
+
+def _fetch(session: requests.Session, url: str, timeout: int = 20) -> Optional[str]:
+    # transient errors / 429 / 5xx are retried by the adapter's Retry policy (honours Retry-After)
+    headers = {"User-Agent": random.choice(USER_AGENTS)}
+    _LIMITER.wait()
+    try:
+        resp = session.get(url, headers=headers, timeout=timeout)
+        txt = resp.text or ""
+    except requests.RequestException:
+        return None
+    # bot-check pages are ~5 KB with their markers up front: scan only the head instead of
+    # lower-casing the whole (up to ~1 MB) body
+    head = txt[:BOT_CHECK_HEAD]
+    if resp.ok and "Robot Check" not in head and "captcha" not in head.lower():
+        return txt
     return None
 
 def _soup(html: str) -> BeautifulSoup:
-    return BeautifulSoup(html, "html.parser")
+    # C-backed lxml tree builder; several times faster than html.parser on ~500 KB dp pages
+    return BeautifulSoup(html, "lxml")
 
 # ---------------------------
 # Parsing helpers
 # ---------------------------
-def _extract_title(soup: BeautifulSoup) -> Optional[str]:
-    t = soup.select_one("#productTitle")
+# element ids read by the enrich extractors; _index_ids collects them in one tree walk
+ENRICH_IDS = frozenset({
+    "productTitle", "title", "bylineInfo", "priceblock_ourprice",
+    "priceblock_dealprice", "acrPopover", "acrCustomerReviewText",
+})
+IdIndex = Dict[str, object]
+
+def _index_ids(soup: BeautifulSoup) -> IdIndex:
+    # first element per id in document order, same as select_one("#id")
+    idx: IdIndex = {}
+    for el in soup.find_all(id=ENRICH_IDS.__contains__):
+        idx.setdefault(el["id"], el)
+    return idx
+
+def _one(soup: BeautifulSoup, sel: str, ids: Optional[IdIndex] = None):
+    # plain "#id" selectors are served from the id index when one is given
+    if ids is not None and sel[0] == "#":
+        return ids.get(sel[1:])
+    return soup.select_one(sel)
+
+def _extract_title(soup: BeautifulSoup, ids: Optional[IdIndex] = None) -> Optional[str]:
+    t = _one(soup, "#productTitle", ids)
     if t and t.get_text(strip=True):
         return t.get_text(strip=True)
-    t = soup.select_one("#title") or soup.select_one("h1")
+    t = _one(soup, "#title", ids) or soup.select_one("h1")
     if t and t.get_text(strip=True):
         return t.get_text(strip=True)
     return None
@@ -127,11 +216,7 @@ def _extract_bullets(soup: BeautifulSoup) -> str:
 def _extract_aplus(soup: BeautifulSoup) -> str:
     # Only read known A+ containers; do NOT scan generic expanders to avoid UI prompts
     blocks = []
-    selectors = [
-        "#aplus", "#aplus_feature_div", "#aplus3p_feature_div",
-        "div.aplus", "div.aplus-v2", "div.aplus-module"
-    ]
-    for sel in selectors:
+    for sel in SEL_APLUS:
         for div in soup.select(sel):
             txt = div.get_text(" ", strip=True)
             if txt and len(txt) > 30:
@@ -139,11 +224,11 @@ def _extract_aplus(soup: BeautifulSoup) -> str:
     txt = " | ".join(blocks)[:4000]
     return _strip_ui_lines(txt)
 
-def _extract_brand(soup: BeautifulSoup) -> Optional[str]:
-    a = soup.select_one("#bylineInfo")
+def _extract_brand(soup: BeautifulSoup, ids: Optional[IdIndex] = None) -> Optional[str]:
+    a = _one(soup, "#bylineInfo", ids)
     if a and a.get_text(strip=True):
         return a.get_text(strip=True).replace("Brand: ", "").replace("Visit the ", "").replace(" Store", "").strip()
-    rows = soup.select("#productDetails_techSpec_section_1 tr, #productDetails_detailBullets_sections1 tr")
+    rows = soup.select(SEL_BRAND_ROWS)
     for tr in rows:
         th = tr.select_one("th")
         td = tr.select_one("td")
@@ -156,18 +241,13 @@ def _extract_brand(soup: BeautifulSoup) -> Optional[str]:
     return None
 
 def _parse_price(txt: str) -> Optional[float]:
-    t = txt.replace(",", "").replace("£", "").replace("$", "").replace("€", "").strip()
-    m = re.search(r"([0-9]+(\.[0-9]+)?)", t)
-    if not m:
-        return None
-    try:
-        return float(m.group(1))
-    except Exception:
-        return None
+    # PRICE_RE only matches digits with an optional decimal part, so float() cannot fail
+    m = PRICE_RE.search(txt.translate(PRICE_STRIP_TBL))
+    return float(m.group(1)) if m else None
 
-def _extract_price(soup: BeautifulSoup) -> Optional[float]:
-    for sel in ["#priceblock_ourprice", "#priceblock_dealprice", "span.a-price > span.a-offscreen", "span.a-price-whole"]:
-        el = soup.select_one(sel)
+def _extract_price(soup: BeautifulSoup, ids: Optional[IdIndex] = None) -> Optional[float]:
+    for sel in SEL_PRICE:
+        el = _one(soup, sel, ids)
         if el and el.get_text(strip=True):
             val = _parse_price(el.get_text(strip=True))
             if val:
@@ -179,8 +259,8 @@ def _extract_price(soup: BeautifulSoup) -> Optional[float]:
             return val
     return None
 
-def _extract_rating(soup: BeautifulSoup) -> Optional[float]:
-    el = soup.select_one("#acrPopover") or soup.select_one("span.a-icon-alt")
+def _extract_rating(soup: BeautifulSoup, ids: Optional[IdIndex] = None) -> Optional[float]:
+    el = _one(soup, "#acrPopover", ids) or soup.select_one("span.a-icon-alt")
     if el and el.get_text(strip=True):
         m = STAR_RE.search(el.get_text(strip=True))
         if m:
@@ -190,137 +270,147 @@ def _extract_rating(soup: BeautifulSoup) -> Optional[float]:
                 return None
     return None
 
-def _extract_reviews_count(soup: BeautifulSoup) -> Optional[int]:
-    el = soup.select_one("#acrCustomerReviewText") or soup.select_one("span[data-hook='total-review-count']")
-    if el and el.get_text(strip=True):
-        m = INT_RE.search(el.get_text(strip=True).replace(",", ""))
-        if m:
-            try:
-                return int(m.group(1).replace(",", ""))
-            except Exception:
-                return None
-    el = soup.select_one("a[href*='#customerReviews'] span")
-    if el and el.get_text(strip=True):
-        m = INT_RE.search(el.get_text(strip=True).replace(",", ""))
-        if m:
-            try:
-                return int(m.group(1).replace(",", ""))
-            except Exception:
-                return None
+def _count_of(el) -> Optional[int]:
+    if not el:
+        return None
+    # thousands separators stripped in one translate pass; the match is then comma-free
+    m = INT_RE.search(el.get_text(strip=True).translate(COMMA_STRIP_TBL))
+    if m:
+        try:
+            return int(m.group(1))
+        except ValueError:
+            return None
     return None
 
-def _extract_related_asins(soup: BeautifulSoup) -> List[str]:
-    asins = set()
-    for el in soup.select("[data-asin]"):
-        a = (el.get("data-asin") or "").strip().upper()
-        if len(a) == 10 and a.startswith("B0"):
-            asins.add(a)
-    for a in soup.select("a[href*='/dp/']"):
-        href = a.get("href") or ""
-        m = ASIN_RE.search(href)
-        if m:
-            asins.add(m.group(1).upper())
-    return list(asins)
+def _extract_reviews_count(soup: BeautifulSoup, ids: Optional[IdIndex] = None) -> Optional[int]:
+    el = _one(soup, "#acrCustomerReviewText", ids) or soup.select_one("span[data-hook='total-review-count']")
+    n = _count_of(el)
+    if n is None:
+        n = _count_of(soup.select_one("a[href*='#customerReviews'] span"))
+    return n
+
+def _related_from_html(html: str) -> List[str]:
+    # one regex scan over the raw page; no tree build needed for ~50 short tokens
+    return list({(d or p).upper() for d, p in RELATED_RE.findall(html)})
+
+def _extract_all(soup: BeautifulSoup) -> Dict[str, object]:
+    # enrich fields from one id-indexed walk instead of a select_one cascade per field
+    ids = _index_ids(soup)
+    return {
+        "title": _extract_title(soup, ids),
+        "price": _extract_price(soup, ids),
+        "rating": _extract_rating(soup, ids),
+        "reviews": _extract_reviews_count(soup, ids),
+        "brand": _extract_brand(soup, ids),
+    }
 
 # ---------------------------
 # Public API
 # ---------------------------
 def search_related_html(seed_asin: str, domain_name: str) -> List[str]:
-    s = _make_session()
+    s = _session_for(domain_name)
     urls = [
         DP_URL.format(domain=domain_name, asin=seed_asin),
         MOBILE_URL.format(domain=domain_name, asin=seed_asin),
     ]
     for url in urls:
-        html = _get(s, url, timeout=20, retries=2, qps=1.2)
+        html = _get(s, url, timeout=20)
         if not html:
             continue
-        soup = _soup(html)
-        rel = _extract_related_asins(soup)
+        rel = _related_from_html(html)
         if rel:
-            return sorted(set(rel))
+            return sorted(rel)
     return []
 
-def enrich_product_info(asins: List[str], domain_name: str) -> pd.DataFrame:
-    s = _make_session()
-    rows = []
-    for a in asins:
-        title = price = rating = reviews = brand = None
-        url_used = ""
-        url = DP_URL.format(domain=domain_name, asin=a)
-        html = _get(s, url, timeout=20, retries=2, qps=1.2)
-        if html:
-            soup = _soup(html)
-            title = _extract_title(soup)
-            price = _extract_price(soup)
-            rating = _extract_rating(soup)
-            reviews = _extract_reviews_count(soup)
-            brand = _extract_brand(soup)
-            url_used = url
-        if not title or rating is None:
-            url2 = MOBILE_URL.format(domain=domain_name, asin=a)
-            html2 = _get(s, url2, timeout=20, retries=2, qps=1.2)
-            if html2:
-                soup2 = _soup(html2)
-                title = title or _extract_title(soup2)
-                price = price or _extract_price(soup2)
-                rating = rating if rating is not None else _extract_rating(soup2)
-                reviews = reviews if reviews is not None else _extract_reviews_count(soup2)
-                brand = brand or _extract_brand(soup2)
-                if not url_used:
-                    url_used = url2
-        rows.append({
-            "asin": a,
-            "title": title,
-            "price": price,
-            "rating": rating,
-            "reviews": reviews,
-            "url": url_used or DP_URL.format(domain=domain_name, asin=a),
-            "brand": brand,
-            "category": None,
-        })
-        time.sleep(0.5)
-    return pd.DataFrame(rows)
-
-def scrape_listing_text(asins: List[str], domain_name: str) -> Dict[str, Dict[str, str]]:
-    s = _make_session()
-    out: Dict[str, Dict[str, str]] = {}
-    for a in asins:
-        title = bullets = aplus = brand = None
-
-        url_m = MOBILE_URL.format(domain=domain_name, asin=a)
-        html_m = _get(s, url_m, timeout=20, retries=2, qps=1.2)
-        if html_m:
-            sm = _soup(html_m)
-            title = _extract_title(sm) or title
-            bullets = _extract_bullets(sm) or bullets
-            aplus = _extract_aplus(sm) or aplus
-            brand = _extract_brand(sm) or brand
+def _enrich_page(s: requests.Session, url: str) -> Optional[dict]:
+    html = _get(s, url, timeout=20)
+    return _extract_all(_soup(html)) if html else None
+
+def _enrich_one(s: requests.Session, a: str, domain_name: str) -> tuple:
+    title = price = rating = reviews = brand = None
+    url_used = ""
+    url = DP_URL.format(domain=domain_name, asin=a)
+    f = _enrich_page(s, url)
+    if f:
+        title, price, rating, reviews, brand = f["title"], f["price"], f["rating"], f["reviews"], f["brand"]
+        url_used = url
+    if not title or rating is None:
+        url2 = MOBILE_URL.format(domain=domain_name, asin=a)
+        f2 = _enrich_page(s, url2)
+        if f2:
+            title = title or f2["title"]
+            price = price or f2["price"]
+            rating = rating if rating is not None else f2["rating"]
+            reviews = reviews if reviews is not None else f2["reviews"]
+            brand = brand or f2["brand"]
+            if not url_used:
+                url_used = url2
+    # same order as ENRICH_DTYPES
+    return (a, title, price, rating, reviews, url_used or DP_URL.format(domain=domain_name, asin=a), brand, None)
+
+def _workers(concurrency: int) -> int:
+    return max(1, min(concurrency, POOL_MAXSIZE))
+
+def _unique_asins(asins: List[str]) -> List[str]:
+    # drop duplicates/blank entries up front so each ASIN costs at most one fetch + parse
+    return list(dict.fromkeys(a for a in asins if a and len(a) == 10))
 
+def enrich_product_info(asins: List[str], domain_name: str, concurrency: int = DEFAULT_CONCURRENCY) -> pd.DataFrame:
+    asins = _unique_asins(asins)
+    s = _session_for(domain_name)
+    # overlap per-ASIN request latency across a small worker pool; map() keeps input order
+    with ThreadPoolExecutor(max_workers=_workers(concurrency)) as ex:
+        rows = list(ex.map(lambda a: _enrich_one(s, a, domain_name), asins))
+    # transpose once into columns and build each with its final dtype (no per-row dicts / inference)
+    cols = list(zip(*rows)) or [()] * len(ENRICH_DTYPES)
+    return pd.DataFrame({
+        name: pd.Series(vals, dtype=dtype)
+        for (name, dtype), vals in zip(ENRICH_DTYPES.items(), cols)
+    })
+
+def _scrape_one(s: requests.Session, a: str, domain_name: str) -> Dict[str, str]:
+    title = bullets = aplus = brand = None
+
+    url_m = MOBILE_URL.format(domain=domain_name, asin=a)
+    html_m = _get(s, url_m, timeout=20)
+    if html_m:
+        sm = _soup(html_m)
+        title = _extract_title(sm) or title
+        bullets = _extract_bullets(sm) or bullets
+        aplus = _extract_aplus(sm) or aplus
+        brand = _extract_brand(sm) or brand
+
+    # desktop page only fills gaps: skip the second request when mobile already has the core fields
+    html_d = None
+    if not (title and bullets and aplus and brand):
         url_d = DP_URL.format(domain=domain_name, asin=a)
-        html_d = _get(s, url_d, timeout=20, retries=2, qps=1.2)
-        if html_d:
-            sd = _soup(html_d)
-            title = title or _extract_title(sd)
-            if not bullets:
-                bullets = _extract_bullets(sd)
-            apl2 = _extract_aplus(sd)
-            if apl2:
-                if aplus:
-                    if apl2 not in aplus:
-                        aplus = (aplus + " | " + apl2)[:4000]
-                else:
-                    aplus = apl2
-            brand = brand or _extract_brand(sd)
-
-        # final UI cleanup of aplus text
-        aplus = _strip_ui_lines(aplus or "")
-
-        out[a] = {
-            "title": title or "",
-            "bullets": bullets or "",
-            "aplus": aplus or "",
-            "brand": brand or "",
-        }
-        time.sleep(0.5)
+        html_d = _get(s, url_d, timeout=20)
+    if html_d:
+        sd = _soup(html_d)
+        title = title or _extract_title(sd)
+        if not bullets:
+            bullets = _extract_bullets(sd)
+        apl2 = _extract_aplus(sd)
+        if apl2:
+            if aplus:
+                if apl2 not in aplus:
+                    # both halves are already cleaned; only the truncated merge needs another pass
+                    aplus = _strip_ui_lines((aplus + " | " + apl2)[:4000])
+            else:
+                aplus = apl2
+        brand = brand or _extract_brand(sd)
+
+    return {
+        "title": title or "",
+        "bullets": bullets or "",
+        "aplus": aplus or "",
+        "brand": brand or "",
+    }
+
+def scrape_listing_text(asins: List[str], domain_name: str, concurrency: int = DEFAULT_CONCURRENCY) -> Dict[str, Dict[str, str]]:
+    asins = _unique_asins(asins)
+    s = _session_for(domain_name)
+    with ThreadPoolExecutor(max_workers=_workers(concurrency)) as ex:
+        texts = list(ex.map(lambda a: _scrape_one(s, a, domain_name), asins))
+    out: Dict[str, Dict[str, str]] = dict(zip(asins, texts))
     return out
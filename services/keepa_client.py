@@ -1,7 +1,77 @@
-import time, requests
+import atexit, functools, threading, requests
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Tuple, Optional, Dict
 from core.cache import SimpleRateLimiter
 
+KEEPA_PRODUCT_URL = "https://api.keepa.com/product"
+RELATED_KEYS = ("alsoBought","alsoViewed","frequentlyBoughtTogether","related")
+BATCH_MAX = 100  # Keepa /product 单次最多 100 个 ASIN
+
+# 进程内缓存：只存从产品派生出的小结果（related 列表、BSR 序列），不存整个产品 payload
+# （history=1 时带完整 csv 历史数组，很大）。键为 (kind, ASIN, domain)；
+# 命中时既不等限速器也不消耗 Keepa token
+PRODUCT_CACHE_TTL = 1800
+_PRODUCT_CACHE = TTLCache(maxsize=4096, ttl=PRODUCT_CACHE_TTL)
+_PRODUCT_LOCK = threading.Lock()
+
+def _cache_get(kind: str, asin: str, dom: int) -> Optional[list]:
+    with _PRODUCT_LOCK:
+        v = _PRODUCT_CACHE.get((kind, asin.upper(), dom))
+    return None if v is None else list(v)
+
+def _remember(p: dict, asin: str, dom: int, history: int) -> None:
+    """从产品派生 related（以及 history=1 时的 BSR 序列）写入缓存；返回给调用方的都是副本"""
+    a = asin.upper()
+    related = tuple(_related_of(p, a))
+    series = tuple(_bsr_series_of(p)) if history else None
+    with _PRODUCT_LOCK:
+        _PRODUCT_CACHE[("related", a, dom)] = related
+        if series is not None:
+            _PRODUCT_CACHE[("bsr", a, dom)] = series
+
+@functools.lru_cache(maxsize=None)
+def _shared_session(retries: int) -> requests.Session:
+    # 进程级共享 Session：页面每次运行都会新建 KeepaClient，共享连接池让
+    # DNS 解析和 TCP+TLS 握手只在首次请求时发生，之后复用 keep-alive 连接。
+    # 重试交给 urllib3 Retry：指数退避，429/5xx 时遵守 Retry-After
+    retry = Retry(
+        total=retries, backoff_factor=0.6, status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET",), respect_retry_after_header=True,
+    )
+    s = requests.Session()
+    s.headers.update({"Accept": "application/json"})
+    s.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retry))
+    atexit.register(s.close)
+    return s
+
+def _related_of(p: dict, asin: str) -> List[str]:
+    """合并 alsoBought/alsoViewed/frequentlyBoughtTogether/related 并去重（不含自身）"""
+    related = set()
+    for k in RELATED_KEYS:
+        v = p.get(k)
+        if v:
+            related.update(x.upper() for x in v if isinstance(x, str) and len(x) == 10)
+    related.discard(asin.upper())
+    return sorted(related)
+
+def _bsr_series_of(p: dict) -> List[tuple]:
+    # Keepa 历史：salesRanks 是 {categoryId: [time0, val0, time1, val1, ...]}
+    ranks = p.get("salesRanks") or {}
+    if not ranks:
+        return []
+    # 选第一条类目的 ranks
+    first = next(iter(ranks.values()))
+    # Keepa 时间戳是相对时间（minutes since 1970-01-01? Keepa docs），这里只作相对序列返回
+    series = []
+    for i in range(0, len(first), 2):
+        t = first[i]
+        v = first[i+1] if i+1 < len(first) else None
+        series.append((t, v))
+    return series
+
 class KeepaClient:
     def __init__(self, api_key: str | None, domain_map: Dict[str,int], timeout=25, retries=2):
         self.key = api_key or ""
@@ -9,39 +79,89 @@ class KeepaClient:
         self.timeout = timeout
         self.retries = retries
         self.rl = SimpleRateLimiter(qps=2.0)
+        self._session = _shared_session(retries)
+
+    def close(self):
+        # 只释放空闲连接；共享 Session 之后仍可继续使用
+        self._session.close()
 
     def product_related(self, asin: str, domain_name: str, history: int = 0) -> Tuple[List[str], Optional[str]]:
         """返回 related ASIN 列表（alsoBought/alsoViewed/frequentlyBoughtTogether/related 合并去重）"""
         if not self.key:
             return [], "No Keepa API Key"
         dom = self.domain_map.get(domain_name, 2)
-        url = "https://api.keepa.com/product"
+        related = _cache_get("related", asin, dom)
+        if related is not None:
+            return related, None
         params = {"key": self.key, "domain": dom, "asin": asin, "history": history}
+        try:
+            data = self._get_json(params)
+        except Exception as e:
+            return [], f"Keepa request failed: {e}"
+        if "error" in data and data["error"]:
+            return [], f"Keepa API error: {data['error']}"
+        products = data.get("products") or []
+        if not products:
+            return [], "No products returned"
+        _remember(products[0], asin, dom, history)
+        return _related_of(products[0], asin), None
+
+    def product_related_many(self, asins: List[str], domain_name: str, history: int = 0,
+                             max_workers: int = 4) -> Dict[str, Tuple[List[str], Optional[str]]]:
+        """并发版 product_related：返回 {asin: (related 列表, 错误信息)}；速率由共享的 self.rl 统一限制"""
+        uniq = list(dict.fromkeys(a.upper() for a in asins if a))
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as ex:
+            results = ex.map(lambda a: self.product_related(a, domain_name, history), uniq)
+            return dict(zip(uniq, results))
+
+    def _get_json(self, params: dict) -> dict:
+        # 单次请求；连接错误/429/5xx 的重试由 Session 上的 Retry 处理
+        self.rl.wait()
+        r = self._session.get(KEEPA_PRODUCT_URL, params=params, timeout=self.timeout)
+        r.raise_for_status()
+        return r.json()
+
+    def _products_batch(self, asins: List[str], dom: int, history: int) -> List[dict]:
+        """一次请求取一组 ASIN（逗号分隔，≤ BATCH_MAX）；失败返回空列表"""
+        params = {"key": self.key, "domain": dom, "asin": ",".join(asins), "history": history}
+        try:
+            data = self._get_json(params)
+        except Exception:
+            return []
+        if "error" in data and data["error"]:
+            return []
+        return data.get("products") or []
+
+    def _iter_batches(self, asins: List[str], domain_name: str | None, history: int, chunk: int, kind: str):
+        """产出 (asin, 派生结果)；kind 为 "related" 或 "bsr"（后者要求 history=1）"""
+        dom = self.domain_map.get(domain_name, 2) if domain_name else 2
+        chunk = max(1, min(chunk, BATCH_MAX))
+        derive = _related_of if kind == "related" else (lambda p, a: _bsr_series_of(p))
+        uniq = list(dict.fromkeys(a.upper() for a in asins if a))
+        # 先用缓存，只请求未命中的 ASIN
+        missing = []
+        for a in uniq:
+            v = _cache_get(kind, a, dom)
+            if v is not None:
+                yield a, v
+            else:
+                missing.append(a)
+        for i in range(0, len(missing), chunk):
+            for p in self._products_batch(missing[i:i + chunk], dom, history):
+                a = (p.get("asin") or "").upper()
+                if a:
+                    _remember(p, a, dom, history)
+                    yield a, derive(p, a)
+
+    def product_related_batch(self, asins: List[str], domain_name: str, history: int = 0, chunk: int = BATCH_MAX) -> Dict[str, List[str]]:
+        """批量版 product_related：每 chunk 个 ASIN 一次请求，返回 {asin: related 列表}"""
+        out: Dict[str, List[str]] = {a.upper(): [] for a in asins if a}
+        if not self.key:
+            return out
+        for a, related in self._iter_batches(asins, domain_name, history, chunk, "related"):
+            out[a] = related
+        return out
 
-        last_err = None
-        for _ in range(self.retries + 1):
-            try:
-                self.rl.wait()
-                r = requests.get(url, params=params, timeout=self.timeout)
-                r.raise_for_status()
-                data = r.json()
-                if "error" in data and data["error"]:
-                    return [], f"Keepa API error: {data['error']}"
-                products = data.get("products") or []
-                if not products:
-                    return [], "No products returned"
-                p = products[0]
-                related = set()
-                for k in ("alsoBought","alsoViewed","frequentlyBoughtTogether","related"):
-                    for x in (p.get(k) or []):
-                        if isinstance(x, str) and len(x) == 10:
-                            related.add(x.upper())
-                related.discard(asin.upper())
-                return list(sorted(related)), None
-            except Exception as e:
-                last_err = str(e)
-                time.sleep(0.6)
-        return [], f"Keepa request failed: {last_err}"
     # ---- 新增：BSR 历史序列（简版） ----
     def product_bsr_series(self, asin: str, domain_name: str | None = None):
         """
@@ -52,35 +172,27 @@ class KeepaClient:
         if not self.key:
             return []
         dom = self.domain_map.get(domain_name, 2) if domain_name else 2
-        url = "https://api.keepa.com/product"
+        series = _cache_get("bsr", asin, dom)
+        if series is not None:
+            return series
         params = {"key": self.key, "domain": dom, "asin": asin, "history": 1}
-        last_err = None
-        for _ in range(self.retries + 1):
-            try:
-                self.rl.wait()
-                r = requests.get(url, params=params, timeout=self.timeout)
-                r.raise_for_status()
-                data = r.json()
-                if "error" in data and data["error"]:
-                    return []
-                products = data.get("products") or []
-                if not products:
-                    return []
-                p = products[0]
-                # Keepa 历史：salesRanks 是 {categoryId: [time0, val0, time1, val1, ...]}
-                ranks = p.get("salesRanks") or {}
-                if not ranks:
-                    return []
-                # 选第一条类目的 ranks
-                first = next(iter(ranks.values()))
-                # Keepa 时间戳是相对时间（minutes since 1970-01-01? Keepa docs），这里只作相对序列返回
-                series = []
-                for i in range(0, len(first), 2):
-                    t = first[i]
-                    v = first[i+1] if i+1 < len(first) else None
-                    series.append((t, v))
-                return series
-            except Exception as e:
-                last_err = str(e)
-                time.sleep(0.6)
-        return []
+        try:
+            data = self._get_json(params)
+        except Exception:
+            return []
+        if "error" in data and data["error"]:
+            return []
+        products = data.get("products") or []
+        if not products:
+            return []
+        _remember(products[0], asin, dom, 1)
+        return _bsr_series_of(products[0])
+
+    def product_bsr_series_batch(self, asins: List[str], domain_name: str | None = None, chunk: int = BATCH_MAX) -> Dict[str, list]:
+        """批量版 product_bsr_series：返回 {asin: [(t, bsr), ...]}，取不到的为空列表"""
+        out: Dict[str, list] = {a.upper(): [] for a in asins if a}
+        if not self.key:
+            return out
+        for a, series in self._iter_batches(asins, domain_name, 1, chunk, "bsr"):
+            out[a] = series
+        return out
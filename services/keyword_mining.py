@@ -1,14 +1,18 @@
 # -*- coding: utf-8 -*-
 import re
-import math
-from collections import Counter, defaultdict
-from typing import Dict, List, Tuple
+import sys
+import functools
+import threading
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+from cachetools import LRUCache
+import numpy as np
 import pandas as pd
 
 # ---------------------------
 # Built-in stopwords and noise filters
 # ---------------------------
-EN_STOPWORDS = set("""
+EN_STOPWORDS = frozenset(map(sys.intern, """
 a an the and or but if while as than then so very more most such each per
 i you he she it we they me him her us them my your his her its our their
 this that these those who whom whose which what where when why how
@@ -19,16 +23,16 @@ up down out off across through between among along around behind beyond
 again further also only same other another any all some no nor not
 there here above below before after during until against about
 own once ever never always sometimes often usually
-""".split())
+""".split()))
 
 # Domain-generic words you likely do not want to rank high
-DOMAIN_NOISE = set("""
+DOMAIN_NOISE = frozenset(map(sys.intern, """
 set kit stainless steel 304 home brewing brewer brewers brews beer
 plastic glass rubber silver black white
-""".split())
+""".split()))
 
 # Measurement / unit tokens and patterns
-UNIT_TOKENS = set("l ml cl dl oz floz inch in cm mm m kg g lb lbs pack packs pcs piece pieces pair".split())
+UNIT_TOKENS = frozenset(map(sys.intern, "l ml cl dl oz floz inch in cm mm m kg g lb lbs pack packs pcs piece pieces pair".split()))
 SIZE_PAT = re.compile(r"""
 ^(
     \d+([./-]\d+)?([./-]\d+)?     # 5, 5/16, 3-8, 10.5
@@ -51,45 +55,48 @@ UI_NOISE_PATTERNS = [
     r"\bsee more\b",
 ]
 UI_NOISE_RE = re.compile("|".join(UI_NOISE_PATTERNS), flags=re.I)
+ALPHA_RE = re.compile(r"[a-z]")
+
+# ASINs listed per keyword in sample_asins
+SAMPLE_ASINS = 8
 
 # ---------------------------
 # Text cleaning / tokenizing
 # ---------------------------
-def _clean_text(s: str) -> str:
+# keep a-z 0-9 and - + . / ; every other ASCII char (incl. whitespace) becomes a space
+_KEEP_CHARS = set("abcdefghijklmnopqrstuvwxyz0123456789-+./")
+CLEAN_TBL = str.maketrans({chr(c): " " for c in range(128) if chr(c) not in _KEEP_CHARS})
+
+def _clean_words(s: str) -> List[str]:
     if not s:
-        return ""
-    s = s.lower()
-    s = re.sub(r"[^a-z0-9\s\-\+./]", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+        return []
+    # non-ASCII -> "?" -> space, then one C-level translate + split instead of two re.sub passes
+    return s.lower().encode("ascii", "replace").decode("ascii").translate(CLEAN_TBL).split()
 
 def _tokenize(text: str, stop: set) -> List[str]:
-    toks = _clean_text(text).split()
-    toks = [t for t in toks if len(t) > 1]
-    return toks
+    # interned tokens: set/dict lookups against the interned word lists and between
+    # n-gram keys can settle on pointer identity
+    return [sys.intern(t) for t in _clean_words(text) if len(t) > 1]
 
-def _ngrams(tokens: List[str], n_min: int, n_max: int) -> List[List[str]]:
-    res: List[List[str]] = []
+def _ngrams(tokens: List[str], n_min: int, n_max: int) -> List[Tuple[str, ...]]:
+    # zip over shifted views builds the tuples in C, no per-n-gram slice
+    res: List[Tuple[str, ...]] = []
     for n in range(n_min, n_max + 1):
-        for i in range(0, len(tokens) - n + 1):
-            res.append(tokens[i:i + n])
+        if n == 1:
+            res.extend((t,) for t in tokens)
+        else:
+            res.extend(zip(*(tokens[i:] for i in range(n))))
     return res
 
+@functools.lru_cache(maxsize=None)
 def _is_unit_token(t: str) -> bool:
-    if t in UNIT_TOKENS:
-        return True
-    if SIZE_PAT.match(t):
-        return True
-    if re.match(r"^\d+(?:[./-]\d+)?(l|ml|cl|dl|oz|in|cm|mm|m|kg|g|lb|lbs)$", t):
-        return True
-    if re.match(r"^(in|cm|mm|m)\d+$", t):
-        return True
-    return False
+    # SIZE_PAT already covers "<number><unit>" (e.g. 5ml, 3/8in) and "<unit><number>" (e.g. m6)
+    return t in UNIT_TOKENS or SIZE_PAT.match(t) is not None
 
-def _ngram_to_text(ng: List[str]) -> str:
+def _ngram_to_text(ng: Sequence[str]) -> str:
     return " ".join(ng)
 
-def _is_noise_ngram(ng: List[str], stop_all: set) -> bool:
+def _is_noise_ngram(ng: Sequence[str], stop_all: set) -> bool:
     """
     Decide whether an n-gram is noise:
     - matches UI noise
@@ -101,6 +108,14 @@ def _is_noise_ngram(ng: List[str], stop_all: set) -> bool:
     if not ng:
         return True
 
+    # unigram fast path: UI-noise phrases are all multi-word, so only the per-token rules apply
+    if len(ng) == 1:
+        t = ng[0]
+        return (
+            _is_unit_token(t) or t in stop_all or t.isdigit() or t in DOMAIN_NOISE
+            or len(t) <= 2 or not ALPHA_RE.search(t)
+        )
+
     text = _ngram_to_text(ng)
     if UI_NOISE_RE.search(text):
         return True
@@ -125,12 +140,14 @@ def _is_noise_ngram(ng: List[str], stop_all: set) -> bool:
     if sw_ratio >= 0.5:
         return True
 
+    core_text = _ngram_to_text(core)
+
     # must contain alpha
-    if not re.search(r"[a-z]", _ngram_to_text(core)):
+    if not ALPHA_RE.search(core_text):
         return True
 
     # over-short after trimming
-    if len(_ngram_to_text(core)) <= 2:
+    if len(core_text) <= 2:
         return True
 
     # excessive punctuation artifacts
@@ -139,6 +156,71 @@ def _is_noise_ngram(ng: List[str], stop_all: set) -> bool:
 
     return False
 
+NOISE_MEMO_MAX = 1 << 18
+
+@functools.lru_cache(maxsize=8)
+def _make_noise_filter(stop_all: frozenset):
+    """Return keep(g) -> bool for one stopword set.
+
+    The same phrase recurs across ASINs, fields and runs, so _is_noise_ngram runs once per
+    distinct n-gram; stop_all and the memo are closure cells, so the per-n-gram path is a
+    single dict lookup keyed by g (no (g, stop_all) key tuple per call).
+    """
+    memo: Dict[Tuple[str, ...], bool] = {}
+
+    def keep(g: Tuple[str, ...]) -> bool:
+        ok = memo.get(g)
+        if ok is None:
+            if len(memo) >= NOISE_MEMO_MAX:
+                memo.clear()
+            ok = memo[g] = not _is_noise_ngram(g, stop_all)
+        return ok
+
+    return keep
+
+def _field_ngrams(text: str, n_min: int, n_max: int, stop_all: frozenset) -> frozenset:
+    """Kept n-grams of one field. Only presence per field counts, so a set is enough."""
+    toks = _tokenize(text, stop_all)
+    # de-duplicate in C first so the noise filter sees each distinct n-gram once per field
+    return frozenset(filter(_make_noise_filter(stop_all), set(_ngrams(toks, n_min, n_max))))
+
+# n-gram cache keyed by (text, n_min, n_max, stop_all), so an ASIN re-mined in another
+# cluster / rerun costs a dict lookup. Bounded by bytes like core.cache: an entry holds the
+# field text plus a frozenset of n-gram tuples (~100 KB for a long A+ block), so the budget
+# fits one maximum Keyword Intel cluster (300 ASINs x 3 fields, ~90 MB)
+FIELD_CACHE_BYTES = 128 * 1024 * 1024
+_FIELD_CACHE = LRUCache(maxsize=FIELD_CACHE_BYTES, getsizeof=lambda e: e[1])
+_FIELD_LOCK = threading.Lock()
+
+def _field_entry(text: str, grams: frozenset) -> Tuple[frozenset, int]:
+    # (grams, approximate bytes held); tokens are interned and shared, so count containers
+    size = sys.getsizeof(text) + sys.getsizeof(grams) + sum(map(sys.getsizeof, grams))
+    return grams, size
+
+def _ngrams_for_samples(samples: List[Tuple[str, ...]], n_min: int, n_max: int, stop_all: frozenset) -> List[Tuple[frozenset, ...]]:
+    """Per-sample (title, bullets, aplus) n-gram sets, in input order.
+
+    Cached field texts are resolved first; only the misses are computed.
+    """
+    found: Dict[str, frozenset] = {}
+    missing: List[str] = []
+    with _FIELD_LOCK:
+        for t in dict.fromkeys(f for fields in samples for f in fields):
+            e = _FIELD_CACHE.get((t, n_min, n_max, stop_all))
+            if e is None:
+                missing.append(t)
+            else:
+                found[t] = e[0]
+
+    computed = [_field_entry(t, _field_ngrams(t, n_min, n_max, stop_all)) for t in missing]
+
+    with _FIELD_LOCK:
+        for t, e in zip(missing, computed):
+            found[t] = e[0]
+            if e[1] <= FIELD_CACHE_BYTES:
+                _FIELD_CACHE[(t, n_min, n_max, stop_all)] = e
+    return [tuple(found[f] for f in fields) for fields in samples]
+
 def _empty_kw_df() -> pd.DataFrame:
     return pd.DataFrame(
         columns=[
@@ -170,8 +252,8 @@ def mine_keywords_from_cluster(
       debug_rows: list of small dicts for traceability
     """
     # merge built-in stopwords with user config
-    user_sw = set(getattr(cfg, "stopwords", []) or [])
-    stop_all = EN_STOPWORDS | user_sw
+    user_sw = {sys.intern(w) for w in (getattr(cfg, "stopwords", []) or [])}
+    stop_all = frozenset(EN_STOPWORDS | user_sw)  # hashable: part of the n-gram cache keys
 
     # weights
     weight = getattr(cfg, "weight", None)
@@ -190,69 +272,57 @@ def mine_keywords_from_cluster(
     min_df_cfg = int(getattr(cfg, "min_df", 2))
     max_top = int(getattr(cfg, "max_top", 200))
 
-    # counters
-    df_count: Counter = Counter()
-    tf_weighted: Counter = Counter()
-    per_kw_asins: defaultdict = defaultdict(set)
-    title_hits: Counter = Counter()
-    bullet_hits: Counter = Counter()
-    aplus_hits: Counter = Counter()
+    # counters keyed by n-gram tuple; joined to a string once per unique keyword in _build_df
+    df_count: defaultdict = defaultdict(int)
+    tf_weighted: defaultdict = defaultdict(float)
+    per_kw_asins: defaultdict = defaultdict(list)  # first SAMPLE_ASINS ASINs per keyword
+    title_hits: defaultdict = defaultdict(int)
+    bullet_hits: defaultdict = defaultdict(int)
+    aplus_hits: defaultdict = defaultdict(int)
     debug_rows: List[dict] = []
 
-    # iterate samples
-    for asin, parts in (texts_by_asin or {}).items():
-        title = (parts.get("title") or "").strip()
-        bullets = (parts.get("bullets") or "").strip()
-        aplus = (parts.get("aplus") or "").strip()
-
-        toks_t = _tokenize(title, stop_all)
-        toks_b = _tokenize(bullets, stop_all)
-        toks_a = _tokenize(aplus, stop_all)
-
-        # generate and filter n-grams
-        grams_t = []
-        for g in _ngrams(toks_t, n_min, n_max):
-            if not _is_noise_ngram(g, stop_all):
-                grams_t.append(tuple(g))
-
-        grams_b = []
-        for g in _ngrams(toks_b, n_min, n_max):
-            if not _is_noise_ngram(g, stop_all):
-                grams_b.append(tuple(g))
-
-        grams_a = []
-        for g in _ngrams(toks_a, n_min, n_max):
-            if not _is_noise_ngram(g, stop_all):
-                grams_a.append(tuple(g))
-
-        seen_in_asin = set()
-
-        # title
-        for g in set(grams_t):
-            key = " ".join(g)
-            tf_weighted[key] += w_title
-            title_hits[key] += 1
-            per_kw_asins[key].add(asin)
-            seen_in_asin.add(key)
-
-        # bullets
-        for g in set(grams_b):
-            key = " ".join(g)
-            tf_weighted[key] += w_bul
-            bullet_hits[key] += 1
-            per_kw_asins[key].add(asin)
-            seen_in_asin.add(key)
-
-        # aplus
-        for g in set(grams_a):
-            key = " ".join(g)
-            tf_weighted[key] += w_apl
-            aplus_hits[key] += 1
-            per_kw_asins[key].add(asin)
-            seen_in_asin.add(key)
+    samples = [
+        (
+            asin,
+            (parts.get("title") or "").strip(),
+            (parts.get("bullets") or "").strip(),
+            (parts.get("aplus") or "").strip(),
+        )
+        for asin, parts in (texts_by_asin or {}).items()
+    ]
+
+    # tokenize, generate and filter n-grams (cached per field text)
+    grams_per_asin = _ngrams_for_samples([s[1:] for s in samples], n_min, n_max, stop_all)
+
+    # phrases that only ever appear in A+ (never in any title/bullets) are treated as UI/helper
+    # text and never ranked, so don't count them at all: A+ n-grams are intersected with the
+    # cluster's title+bullet vocabulary before accumulation
+    tb_vocab = set()
+    for grams_t, grams_b, _ in grams_per_asin:
+        tb_vocab |= grams_t
+        tb_vocab |= grams_b
 
+    # iterate samples
+    for (asin, title, bullets, aplus), (grams_t, grams_b, grams_a) in zip(samples, grams_per_asin):
+        grams_aa = grams_a & tb_vocab  # A+ only counts phrases also seen in some title/bullets
+        # per-source tf/hit counters; document frequency below runs once over the union
+        for g in grams_t:
+            tf_weighted[g] += w_title
+            title_hits[g] += 1
+        for g in grams_b:
+            tf_weighted[g] += w_bul
+            bullet_hits[g] += 1
+        for g in grams_aa:
+            tf_weighted[g] += w_apl
+            aplus_hits[g] += 1
+        seen_in_asin = grams_t | grams_b | grams_aa
+
+        # seen_in_asin is per ASIN, so each (asin, keyword) pair lands here exactly once
         for key in seen_in_asin:
             df_count[key] += 1
+            sample = per_kw_asins[key]
+            if len(sample) < SAMPLE_ASINS:
+                sample.append(asin)
 
         debug_rows.append({
             "asin": asin,
@@ -261,45 +331,41 @@ def mine_keywords_from_cluster(
             "aplus": aplus[:200],
         })
 
-    # builder with UI-noise and A+-only cleanup
+    # builder: min_df cut and top-k ranking
     def _build_df(min_df_value: int) -> pd.DataFrame:
-        rows: List[dict] = []
-        for kw, dfv in df_count.items():
-            if dfv < min_df_value:
-                continue
-            rows.append({
-                "keyword": kw,
-                "score": round(float(tf_weighted[kw] * (1.0 + math.log1p(dfv))), 4),
-                "df": int(dfv),
-                "tf_weighted": round(float(tf_weighted[kw]), 4),
-                "title_hits": int(title_hits[kw]),
-                "bullet_hits": int(bullet_hits[kw]),
-                "aplus_hits": int(aplus_hits[kw]),
-                "sample_asins": ",".join(list(per_kw_asins[kw])[:8]),
-            })
-        if not rows:
+        # aligned column arrays instead of one dict per keyword
+        grams = [g for g, dfv in df_count.items() if dfv >= min_df_value]
+        if not grams:
             return _empty_kw_df()
-
-        df = pd.DataFrame(rows)
-
-        # First-pass UI noise filter on the table
-        # IMPORTANT: do NOT pass 'case' when using a compiled regex; just use na=False
-        df = df[~df["keyword"].astype(str).str.contains(UI_NOISE_RE, na=False)]
-
-        # Drop phrases that only appear in A+ but never in title/bullets (likely UI/helper text)
-        if {"title_hits", "bullet_hits", "aplus_hits"}.issubset(df.columns):
-            mask_ui_like = (df["title_hits"] == 0) & (df["bullet_hits"] == 0) & (df["aplus_hits"] > 0)
-            df = df[~mask_ui_like]
-
-        # Sort by score/df/tf_weighted
-        sort_cols = [c for c in ["score", "df", "tf_weighted"] if c in df.columns]
-        if sort_cols:
-            df = df.sort_values(sort_cols, ascending=[False] * len(sort_cols))
-        df = df.reset_index(drop=True)
-
-        if len(df) > max_top:
-            df = df.head(max_top).copy()
-        return df
+        n = len(grams)
+        dfv = np.fromiter((df_count[g] for g in grams), dtype=np.int64, count=n)
+        tf_raw = np.fromiter((tf_weighted[g] for g in grams), dtype=np.float64, count=n)
+        score = np.round(tf_raw * (1.0 + np.log1p(dfv)), 4)
+        tfw = np.round(tf_raw, 4)
+
+        # UI-noise phrases (_is_noise_ngram) and A+-only phrases (tb_vocab) never reach the counters
+        idx = np.arange(n)
+
+        # Top max_top by score/df/tf_weighted (descending): argpartition on score keeps every
+        # candidate tied with the cut-off score, then an exact stable lexsort of that slice
+        if len(idx) > max_top:
+            kth = np.partition(-score[idx], max_top - 1)[max_top - 1]
+            idx = idx[-score[idx] <= kth]
+        idx = idx[np.lexsort((-tfw[idx], -dfv[idx], -score[idx]))][:max_top]
+
+        # per-keyword Python work (join, hit lookups) only for the rows that survive the cut
+        top = [grams[i] for i in idx]
+        k = len(top)
+        return pd.DataFrame({
+            "keyword": [" ".join(g) for g in top],
+            "score": score[idx],
+            "df": dfv[idx],
+            "tf_weighted": tfw[idx],
+            "title_hits": np.fromiter((title_hits.get(g, 0) for g in top), dtype=np.int64, count=k),
+            "bullet_hits": np.fromiter((bullet_hits.get(g, 0) for g in top), dtype=np.int64, count=k),
+            "aplus_hits": np.fromiter((aplus_hits.get(g, 0) for g in top), dtype=np.int64, count=k),
+            "sample_asins": [",".join(per_kw_asins[g]) for g in top],
+        })
 
     # Build with configured min_df
     kw_table = _build_df(min_df_cfg)
@@ -329,14 +395,23 @@ def attach_bsr_signal(
     This is not causal; it is a lightweight market heat proxy.
     """
     deltas: List[float] = []
+    # one Keepa request per 100 ASINs instead of one per ASIN
+    try:
+        series_by_asin = keepa_client.product_bsr_series_batch(candidate_asins, domain_name=domain_name)
+    except Exception:
+        series_by_asin = {}
     for a in candidate_asins:
         try:
-            series = keepa_client.product_bsr_series(a, domain_name=domain_name)
+            series = series_by_asin.get(a.upper())
             if not series:
                 continue
-            series = sorted(series, key=lambda x: x[0])
             if len(series) < 2:
                 continue
+            # Keepa series are normally already time-ordered; only argsort when they are not
+            ts = np.fromiter((x[0] for x in series), dtype=np.float64, count=len(series))
+            if not (ts[:-1] <= ts[1:]).all():
+                order = np.argsort(ts, kind="stable")
+                series = [series[i] for i in order]
             last = series[-1][1]
             prev = series[-min(len(series), window)][1]
             if last and prev:
@@ -1,3 +1,4 @@
+import numpy as np
 import pandas as pd
 
 def make_recommendations(df: pd.DataFrame, cfg) -> dict[str, pd.DataFrame]:
@@ -6,44 +7,42 @@ def make_recommendations(df: pd.DataFrame, cfg) -> dict[str, pd.DataFrame]:
     clicks, impressions, orders, spend, sales, keyword, match_type, campaign, ad_group
     """
     df = df.copy()
-    df["ctr"] = df["impressions"].replace(0, 1)
-    df["ctr"] = df["clicks"] / df["impressions"].clip(lower=1)
-    df["cvr"] = df["orders"] / df["clicks"].clip(lower=1)
-    df["acos"] = df["spend"] / df["sales"].clip(lower=1e-9)
+    # 直接在 NumPy 数组上算比率，分母下限防除零
+    imps = df["impressions"].to_numpy()
+    clicks = df["clicks"].to_numpy()
+    orders = df["orders"].to_numpy()
+    cvr = orders / np.maximum(clicks, 1)
+    acos = df["spend"].to_numpy() / np.maximum(df["sales"].to_numpy(), 1e-9)
+    df["ctr"] = clicks / np.maximum(imps, 1)
+    df["cvr"] = cvr
+    df["acos"] = acos
 
     t = cfg.thresholds
     target_acos = cfg.target_acos
     up_pct = cfg.bid_steps.up_pct
     down_pct = cfg.bid_steps.down_pct
 
+    # 各条件只算一次，四组建议复用
+    m_clicks = clicks >= t.min_clicks
+    m_conv = orders >= t.min_conversions
+    m_cvr = cvr >= t.harvest_cvr
+
     # Scale Up
-    up = df[
-        (df["cvr"] >= t.harvest_cvr) &
-        (df["acos"] <= target_acos) &
-        (df["orders"] >= t.min_conversions)
-    ].copy()
+    up = df[m_cvr & (acos <= target_acos) & m_conv].copy()
     up["action"] = f"Increase bid by {int(up_pct*100)}%"
 
     # Bid Down
-    down = df[
-        (df["clicks"] >= t.min_clicks) &
-        ((df["orders"] < t.min_conversions) | (df["acos"] > target_acos*1.2))
-    ].copy()
+    down = df[m_clicks & (~m_conv | (acos > target_acos*1.2))].copy()
     down["action"] = f"Decrease bid by {int(down_pct*100)}%"
 
     # Negatives：点击多、无转化
-    neg = df[
-        (df["clicks"] >= t.min_clicks) &
-        (df["orders"] == 0)
-    ].copy()
-    neg["neg_type"] = neg["match_type"].map(lambda m: "Negative Exact" if str(m).lower()=="exact" else "Negative Phrase")
+    neg = df[m_clicks & (orders == 0)].copy()
+    is_exact = neg["match_type"].astype(str).str.lower().eq("exact").to_numpy()
+    neg["neg_type"] = np.where(is_exact, "Negative Exact", "Negative Phrase")
     neg = neg[["campaign","ad_group","keyword","neg_type","clicks","spend"]].copy()
 
     # Harvest（高 cvr 但展示/覆盖有限）
-    harv = df[
-        (df["cvr"] >= t.harvest_cvr) &
-        (df["impressions"] < df["impressions"].median())
-    ].copy()
+    harv = df[m_cvr & (imps < df["impressions"].median())].copy()
     harv["plan"] = "Create SKAG + add neg-exact in origin"
 
     return {
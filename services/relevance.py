@@ -1,69 +1,60 @@
 import re
+from functools import lru_cache
 import pandas as pd
 
-def _contains_any(text: str, terms: list[str]) -> bool:
-    if not text: return False
-    t = text.lower()
-    return any(re.search(rf"\b{re.escape(w.lower())}\b", t) for w in terms)
+BRAND_FLAGS = ["whitelist", "ok", "unknown", "blacklist"]
+
+@lru_cache(maxsize=256)
+def _terms_pattern(terms: tuple[str, ...]) -> re.Pattern | None:
+    r"""把一组词编译成一个整词匹配的正则 \b(?:t1|t2|...)\b；空列表返回 None"""
+    if not terms: return None
+    return re.compile(r"\b(?:" + "|".join(re.escape(w.lower()) for w in terms) + r")\b")
 
 def score_and_filter(df: pd.DataFrame, cfg) -> tuple[pd.DataFrame, pd.DataFrame]:
     ns = cfg.negatives_scan
     df = df.copy()
     for col in ["title"]:
         df[col] = df[col].fillna("")
+    title_lc = df["title"].astype(str).str.lower()  # 只转一次小写，供 exclude/include 匹配
 
     # brand 列可能为空，先创建
     if "brand" not in df.columns: df["brand"] = None
     if "category" not in df.columns: df["category"] = None
 
     # 1) 黑名单 & 白名单（白名单优先通过）
-    def brand_flag(b):
-        if not b: return "unknown"
-        b_l = str(b).lower()
-        if any(b_l == x.lower() for x in ns.brand_whitelist): return "whitelist"
-        if any(b_l == x.lower() for x in ns.brand_blacklist): return "blacklist"
-        return "ok"
-
-    df["brand_flag"] = df["brand"].apply(brand_flag)
+    # 小写品牌名 -> flag 的字典，整列一次 map；同时出现在两张名单里时白名单优先
+    flag_of = {x.lower(): "blacklist" for x in ns.brand_blacklist}
+    flag_of.update({x.lower(): "whitelist" for x in ns.brand_whitelist})
+    # 与逐行 `if not b` 相同：只有 None/"" 这类假值算 unknown，NaN 按字符串 "nan" 查表（→ ok）
+    has_brand = df["brand"].astype(bool)
+    brand_lc = df["brand"].astype(str).str.lower()
+    df["brand_flag"] = pd.Categorical(brand_lc.map(flag_of).fillna("ok").where(has_brand, "unknown"), categories=BRAND_FLAGS)
 
     # 2) exclude_terms 直接剔除（除非 brand 为白名单）
-    df["exclude_hit"] = df["title"].apply(lambda t: _contains_any(t, ns.exclude_terms))
+    # 所有 exclude 词合成一个预编译正则，整列一次匹配
+    exc_pat = _terms_pattern(tuple(ns.exclude_terms))
+    df["exclude_hit"] = title_lc.str.contains(exc_pat, na=False) if exc_pat else False
 
     # 3) include_terms 打分
-    def include_score(t: str) -> int:
-        return sum(1 for w in ns.include_terms if re.search(rf"\b{re.escape(w.lower())}\b", t.lower()))
-
-    df["include_score"] = df["title"].apply(include_score)
+    # 每个词一个预编译正则、整列匹配；按命中的不同词数计分（词之间可重叠，如 wine / wine bottle）
+    include_score = pd.Series(0, index=df.index)
+    for w in ns.include_terms:
+        include_score += title_lc.str.contains(_terms_pattern((w,)), na=False)
+    df["include_score"] = include_score
 
     # 4) 数值阈值
-    def ok_price(x):
-        try:
-            return ns.price_min <= float(x) <= ns.price_max
-        except: return False
-
-    def ok_rating(x):
-        try:
-            return float(x) >= ns.rating_min
-        except: return False
-
-    def ok_reviews(x):
-        try:
-            return int(x) >= ns.reviews_min
-        except: return False
-
-    df["price_ok"] = df["price"].apply(ok_price)
-    df["rating_ok"] = df["rating"].apply(ok_rating)
-    df["reviews_ok"] = df["reviews"].apply(ok_reviews)
+    # 整列转数值，无法解析的记为 NaN，比较结果按不通过处理
+    price = pd.to_numeric(df["price"], errors="coerce")
+    rating = pd.to_numeric(df["rating"], errors="coerce")
+    reviews = pd.to_numeric(df["reviews"], errors="coerce")
+    df["price_ok"] = price.between(ns.price_min, ns.price_max).fillna(False).astype(bool)
+    df["rating_ok"] = rating.ge(ns.rating_min).fillna(False).astype(bool)
+    df["reviews_ok"] = reviews.ge(ns.reviews_min).fillna(False).astype(bool)
 
     # whitelist 直接通过；blacklist 或 exclude_hit 剔除
-    def pass_filter(row):
-        if row["brand_flag"] == "whitelist":
-            return True
-        if row["brand_flag"] == "blacklist": return False
-        if row["exclude_hit"]: return False
-        return row["price_ok"] and (row["rating_ok"] or row["reviews_ok"])
-
-    df["pass"] = df.apply(pass_filter, axis=1)
+    is_white = df["brand_flag"].eq("whitelist")
+    is_black = df["brand_flag"].eq("blacklist")
+    df["pass"] = is_white | (~is_black & ~df["exclude_hit"] & df["price_ok"] & (df["rating_ok"] | df["reviews_ok"]))
 
     # 5) 计算 RelevanceScore
     # include_score + (rating_ok) + (reviews_ok)
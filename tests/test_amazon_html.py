@@ -0,0 +1,9 @@
+from services.amazon_html import HTTP_RETRY, POOL_MAXSIZE, _session_for
+
+
+def test_www_redirect_target_uses_pooled_retrying_adapter():
+    s = _session_for("amazon.co.uk")
+    for url in ("https://amazon.co.uk/dp/B0AAAAAAA1", "https://www.amazon.co.uk/dp/B0AAAAAAA1"):
+        adapter = s.get_adapter(url)
+        assert adapter.max_retries is HTTP_RETRY
+        assert adapter._pool_maxsize == POOL_MAXSIZE
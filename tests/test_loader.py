@@ -0,0 +1,33 @@
+import io
+
+import pandas as pd
+import pytest
+
+from ppc.loader import REQUIRED_COLS, load_search_terms
+
+# two source columns map to "keyword"; Portfolio name is not in RENAME_MAP and is dropped
+CSV = (
+    "Campaign Name,Match Type,Customer Search Term,Search term,Impressions,Clicks,Spend,Portfolio name\n"
+    "C1,EXACT,brew kit,brew kit alt,1000,25,12.5,P\n"
+    "C2,BROAD,airlock,airlock alt,50,3,1.5,P\n"
+)
+
+
+def _xlsx(csv: str) -> bytes:
+    bio = io.BytesIO()
+    pd.read_csv(io.StringIO(csv)).to_excel(bio, index=False)
+    return bio.getvalue()
+
+
+@pytest.mark.parametrize("name", ["report.csv", "report.xlsx"])
+def test_duplicate_mapped_columns_keep_first_and_fill_missing(name):
+    data = CSV.encode() if name.endswith(".csv") else _xlsx(CSV)
+    df = load_search_terms(data, name)
+
+    assert not df.columns.duplicated().any()
+    assert set(REQUIRED_COLS) <= set(df.columns)
+    assert df["keyword"].tolist() == ["brew kit", "airlock"]
+    # columns absent from the report: counts/amounts filled with 0, text with ""
+    assert df["orders"].tolist() == [0, 0]
+    assert df["sales"].tolist() == [0.0, 0.0]
+    assert df["ad_group"].astype(str).tolist() == ["", ""]